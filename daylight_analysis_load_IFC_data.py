@@ -7,71 +7,193 @@ Outputs
 Excel file
 """
 
-# Main dependencies are xlsxwriter, ifcopenshell, numpy and matplotlib
+# Main dependencies are pyexcelerate, ifcopenshell and numpy
 import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-import xlsxwriter
+from pyexcelerate import Workbook, Style, Font, Fill, Color
 import ifcopenshell
 import ifcopenshell.util
-from ifcopenshell.util.selector import Selector
+import ifcopenshell.util.element
 import ifcopenshell.geom
-from dataclasses import dataclass, InitVar
+import multiprocessing
+from functools import lru_cache
 
 
 # IFC model used throughout the program
-model = ifcopenshell.open("model/Duplex_A_20110907_optimized.ifc")
+IFC_PATH = "model/Duplex_A_20110907_optimized.ifc"
 
 
-# IFC open shell geometry tree and selector lib settings
-tree_settings = ifcopenshell.geom.settings()
-tree_settings.set(tree_settings.DISABLE_OPENING_SUBTRACTIONS, True)
-t = ifcopenshell.geom.tree()
-t.add_file(model, tree_settings)
+@lru_cache(maxsize=1)
+def loadIfc():
+    """
+    Opens the IFC model at IFC_PATH and builds the geometry tree.
+    Nothing is parsed on import, the model is parsed on the first call only.
 
-selector = Selector()
+    Parameters
+    ----------
+
+    Returns
+    -------
+    Tuple of the IFC model and the geometry tree
+    """
+    model = ifcopenshell.open(IFC_PATH)
+
+    # IFC open shell geometry tree settings
+    tree_settings = ifcopenshell.geom.settings()
+    tree_settings.set(tree_settings.DISABLE_OPENING_SUBTRACTIONS, True)
+
+    # Build the tree from a geometry iterator running on all cores. Only the
+    # element types queried in the tree are included.
+    iterator = ifcopenshell.geom.iterator(
+        tree_settings,
+        model,
+        multiprocessing.cpu_count(),
+        include=model.by_type("IfcSpace")
+        + model.by_type("IfcWindow")
+        + model.by_type("IfcDoor")
+        + model.by_type("IfcWall"),
+    )
+    t = ifcopenshell.geom.tree()
+    if iterator.initialize():
+        while True:
+            t.add_element(iterator.get_native())
+            if not iterator.next():
+                break
+
+    return model, t
 
-# define spaces
-spaces = model.by_type("IfcSpace")
 
+# t.select_box results, keyed by (element id, extend)
+_select_box_cache = {}
 
-@dataclass
-class SpaceParams:
+
+def selectBox(element, extend=None):
     """
-    Object for formatting space attributes for analysis.
-    Does nothring when excelformat is chosen.
+    Cached version of t.select_box, the tree query is the main geometry cost
+    and the same spaces and windows are queried for every sheet.
+
+    Parameters
+    ----------
+    element: a single instance of an IFC element
+    extend: distance the bounding box is extended by, tree default if None
+
+    Returns
+    -------
+    List of IFC elements within the element's bounding box, sorted by id since
+    the tree order depends on the order the iterator threads added elements in
     """
+    key = (element.id(), extend)
+    if key not in _select_box_cache:
+        t = loadIfc()[1]
+        if extend is None:
+            elements = t.select_box(element)
+        else:
+            elements = t.select_box(element, extend=extend)
+        _select_box_cache[key] = sorted(elements, key=lambda e: e.id())
+    return _select_box_cache[key]
 
-    out: list
-    excelFormat: InitVar[str] = None
 
-    def __post_init__(self, excelFormat):
+def getSpaces():
+    """
+    Gets the spaces of the IFC model, Hallway and Roof are not analyzed.
 
-        if excelFormat == False:
-            analysisOut = [
-                val[1:2] for val in (self.out if self.out is not None else [])
-            ]
-            self.out = [val for sublist in analysisOut for val in sublist]
-        else:
-            pass
-        return self.out
+    Parameters
+    ----------
+
+    Returns
+    -------
+    Tuple of all IFC spaces and the IFC spaces without Hallway and Roof
+    """
+    spaces = loadIfc()[0].by_type("IfcSpace")
+    analyzableSpaces = [
+        space for space in spaces if space.LongName not in ("Hallway", "Roof")
+    ]
+    return spaces, analyzableSpaces
+
+
+def flattenAnalysis(rows, excelFormat=False):
+    """
+    Formats space attributes for analysis, by dropping the excel column numbers.
+    Does nothing when excelformat is chosen.
+
+    Parameters
+    ----------
+    rows: an array of arrays formatted for writing to excel, or None
+    excelFormat: True or False
+
+    Returns
+    -------
+    rows unchanged when excelformat is true, otherwise a flat list of the values.
+    """
+    if excelFormat:
+        return rows
+    return [val for row in (rows if rows is not None else []) for val in row[1:2]]
 
 
 #############
 ### .XLSX ###
 #############
 
-# Set xlxswriter workbook and formats
-workbook = xlsxwriter.Workbook("output/output_IFC_data.xlsx")
-workbook.set_size(3000, 1500)
-cell_format = workbook.add_format({"bold": True, "bg_color": "#d3d3d3"})
-cell_format2 = workbook.add_format({"bold": True, "bg_color": "#7e7e7e"})
+# Set pyexcelerate workbook and formats. Each sheet is written in one go from
+# a dense list of rows, the styles are only applied to header/section cells.
+workbook = Workbook()
+cell_format = Style(font=Font(bold=True), fill=Fill(background=Color(211, 211, 211)))
+cell_format2 = Style(font=Font(bold=True), fill=Fill(background=Color(126, 126, 126)))
+
+
+def wallLayers(ifcElement):
+    """
+    Gets material layer name and thickness for IFC elements, that are not roof.
+    Used to build the wall layer index once, see wallLayerIndex.
+
+    Parameters
+    ----------
+    ifcElement: a single instance of an IFC element, eg. IFC wall
+
+    Returns
+    -------
+    A list with one list of (material name, thickness) tuples per material association.
+    Empty for roofs.
+    """
+    out = []
+
+    if not "Roof" in (ifcElement.Name or ""):
+        for relAssociatesMaterial in ifcElement.HasAssociations:
+            # get the name and thickness for each materiallayer
+            layers = relAssociatesMaterial.RelatingMaterial.ForLayerSet.MaterialLayers
+            out.append([(ml.Material.Name, float(ml.LayerThickness)) for ml in layers])
+
+    return out
+
+
+@lru_cache(maxsize=1)
+def wallLayerIndex():
+    """
+    Material layers of the walls that bound a space, keyed by wall id. Built in
+    a single pass on the first call, so walls bounding several spaces are only
+    walked once. Only the excel walls sheet needs it.
+
+    Parameters
+    ----------
+
+    Returns
+    -------
+    Dictionary of wall id and the wallLayers of the wall
+    """
+    walls = {}
+    for space in getSpaces()[0]:
+        for obj in space.BoundedBy:
+            if obj.RelatedBuildingElement != None:
+                if obj.RelatedBuildingElement.is_a("IfcWall"):
+                    walls.setdefault(
+                        obj.RelatedBuildingElement.id(), obj.RelatedBuildingElement
+                    )
+    return {wallId: wallLayers(wall) for wallId, wall in walls.items()}
 
 
 def getMaterialAndQuantities(ifcElement):
     """
     Gets material layer name and thickness for IFC elements, that are not roof.
-    Here used only on walls.
+    Here used only on walls, looked up in wallLayerIndex.
 
     Parameters
     ----------
@@ -84,30 +206,41 @@ def getMaterialAndQuantities(ifcElement):
     The following give alternately material name and material thickness.
     """
     out = []
-    col = 0
-    most_materials = 0
+    col = 5
 
-    if not "Roof" in str(ifcElement.Name):
-        col = 5
-        for relAssociatesMaterial in ifcElement.HasAssociations:
-            # get the name and thickness for each materiallayer
-            num_materials = len(
-                relAssociatesMaterial.RelatingMaterial.ForLayerSet.MaterialLayers
-            )
-            if num_materials > most_materials:
-                most_materials = num_materials
-            out.append([col, num_materials])
-            col += 1
-            for (
-                MaterialLayers
-            ) in relAssociatesMaterial.RelatingMaterial.ForLayerSet.MaterialLayers:
-                out.append([col, str(MaterialLayers.Material.Name)])
-                out.append([col + 1, str(MaterialLayers.LayerThickness)])
-                col += 2
+    for layers in wallLayerIndex().get(ifcElement.id(), []):
+        out.append([col, len(layers)])
+        col += 1
+        for name, thickness in layers:
+            out.append([col, name])
+            out.append([col + 1, thickness])
+            col += 2
 
     return out
 
 
+def isExternal(ifcElement, psetName):
+    """
+    Gets the IsExternal property of an IFC element.
+    Looks in the common property set first, then in any other property set.
+
+    Parameters
+    ----------
+    ifcElement: a single instance of an IFC element, eg. IFC wall
+    psetName: name of the common property set, eg. "Pset_WallCommon"
+
+    Returns
+    -------
+    True or False, None if the element has no IsExternal property.
+    """
+    value = ifcopenshell.util.element.get_pset(ifcElement, psetName, "IsExternal")
+    if value is None:
+        for props in ifcopenshell.util.element.get_psets(ifcElement).values():
+            if "IsExternal" in props:
+                return props["IsExternal"]
+    return value
+
+
 def wallParams(wall, debug=False):
     """
     Get and formats information about walls, including name, tag, external or not.
@@ -126,12 +259,9 @@ def wallParams(wall, debug=False):
     outWall.append([2, wall.Name])
     outWall.append([3, wall.Tag])
 
-    for relDefinesByProperties in wall.IsDefinedBy:
-        if "IfcRelDefinesByProperties" in str(relDefinesByProperties):
-            wallProps = relDefinesByProperties.RelatingPropertyDefinition.HasProperties
-            for prop in wallProps:
-                if prop.Name == "IsExternal":
-                    outWall.append([4, prop.NominalValue.wrappedValue])
+    external = isExternal(wall, "Pset_WallCommon")
+    if external is not None:
+        outWall.append([4, external])
 
     for i in getMaterialAndQuantities(wall):
         outWall.append(i)
@@ -139,6 +269,15 @@ def wallParams(wall, debug=False):
     return outWall
 
 
+# Wall orientation by RefDirection of the wall placement, front is (assumed) North
+_WALL_ORIENTATION = {
+    (0.0, 0.0, 0.0): "front",
+    (0.0, -1.0, 0.0): "right",
+    (0.0, 1.0, 0.0): "left",
+    (-1.0, 0.0, 0.0): "back",
+}
+
+
 def windowParams(window, debug=False, excelFormat=False):
     """
     Get and formats information about windows for printing to excel and for simulation.
@@ -158,38 +297,32 @@ def windowParams(window, debug=False, excelFormat=False):
 
     """
     outWindow = []
-    windowHeight = selector.get_element_value(
-        window, "PSet_Revit_Type_Dimensions.Height"
-    )
-    windowWidth = selector.get_element_value(window, "PSet_Revit_Type_Dimensions.Width")
-    sillHeight = selector.get_element_value(
-        window, "PSet_Revit_Constraints.Sill Height"
-    )
+    # read all property sets once and index into them
+    psets = ifcopenshell.util.element.get_psets(window)
+    typeDimensions = psets.get("PSet_Revit_Type_Dimensions", {})
+    windowHeight = typeDimensions.get("Height")
+    windowWidth = typeDimensions.get("Width")
+    sillHeight = psets.get("PSet_Revit_Constraints", {}).get("Sill Height")
     windowLocation = window.ObjectPlacement.PlacementRelTo.RelativePlacement.Location[0]
     loc_x, loc_y = windowLocation[0], windowLocation[2]
 
     wall_name = ""
     wall_length = 0
-    for wall in t.select_box(window):
+    for wall in selectBox(window):
         if wall.is_a("IfcWallStandardCase"):
 
-            wall_length = selector.get_element_value(
-                wall, "PSet_Revit_Dimensions.Length"
+            wall_length = (
+                ifcopenshell.util.element.get_psets(wall)
+                .get("PSet_Revit_Dimensions", {})
+                .get("Length")
             )
             # find wall orientation, front is (assumed) North
             placement = wall.ObjectPlacement.RelativePlacement.RefDirection
 
             if placement is None:
                 placement = ((0.0, 0.0, 0.0),)
-            placement = placement[0]
-            if placement == (0.0, 0.0, 0.0):
-                wall_name = "front"
-            elif placement == (0.0, -1.0, 0.0):
-                wall_name = "right"
-            elif placement == (0.0, 1.0, 0.0):
-                wall_name = "left"
-            elif placement == (-1.0, 0.0, 0.0):
-                wall_name = "back"
+            placement = tuple(float(ratio) for ratio in placement[0])
+            wall_name = _WALL_ORIENTATION.get(placement, wall_name)
 
     if excelFormat == True:
         outWindow.append([2, window.Name])
@@ -229,7 +362,7 @@ def doorParams(door):
     outDoor.append([2, door.Name])
     outDoor.append([3, door.Tag])
 
-    if "Glass" in door.Name:
+    if "Glass" in (door.Name or ""):
         doorHeight = door.OverallHeight
         doorWidth = door.OverallWidth
 
@@ -247,74 +380,86 @@ def doorParams(door):
     return outDoor
 
 
-def intersectingObjects(
-    space,
-    debug=False,
-    windowsOnly=False,
-    doorsOnly=False,
-    wallsOnly=False,
-    excelFormat=False,
+def intersectingObjectsAll(
+    space, debug=False, excelFormat=False, kinds=("windows", "doors", "walls")
 ):
     """
     Get and formats information about spaces.
-    Finds windows, doors and walls bounding a space.
+    Finds windows, doors and walls bounding a space in a single pass.
     Calls the respective IFC element functions.
 
     Parameters
     ----------
     ifcElement: a single instance of an IFC space.
-    windowsOnly: appends only info about spaces and windows
-    doorsOnly: appends only info about spaces and doors
-    wallsOnly: appends only info about spaces and walls
+    kinds: which of "windows", "doors" and "walls" to find, all by default.
 
     Returns
     -------
-    An array of arrays formatted for writing to excel with column number always at index n,0.
+    Tuple of (windows, doors, walls), each an array of arrays formatted for writing
+    to excel with column number always at index n,0.
+    Each of them starts with the info about the space.
+    Kinds that are not found are None.
     """
-    out = []
     if excelFormat == True:
-        out.append(
-            [
-                [0, space.LongName, cell_format],
-                [1, space.Name, cell_format],
-                [2, " ", cell_format],
-                [3, " ", cell_format],
-                [4, " ", cell_format],
-                [5, " ", cell_format],
-                [6, " ", cell_format],
-            ]
+        spaceRow = [
+            [0, space.LongName, cell_format],
+            [1, space.Name, cell_format],
+            [2, " ", cell_format],
+            [3, " ", cell_format],
+            [4, " ", cell_format],
+            [5, " ", cell_format],
+            [6, " ", cell_format],
+        ]
+        windows, doors, walls = (
+            [spaceRow] if kind in kinds else None
+            for kind in ("windows", "doors", "walls")
         )
     else:
-        out.append(space.LongName)
-        out.append(space.Name)
+        windows, doors, walls = (
+            [space.LongName, space.Name] if kind in kinds else None
+            for kind in ("windows", "doors", "walls")
+        )
 
     # get windows and doors that intersect space bounding box (space.BoundedBy doesn't get all windows)
-    for obj in t.select_box(space, extend=0.5):
-        if obj.is_a("IfcWindow") and windowsOnly:
-            out.append(windowParams(obj, debug, excelFormat))
-        elif obj.is_a("IfcDoor") and doorsOnly:
-            for relDefinesByProperties in obj.IsDefinedBy:
-
-                if "IfcRelDefinesByProperties" in str(relDefinesByProperties):
-                    doorProps = (
-                        relDefinesByProperties.RelatingPropertyDefinition.HasProperties
-                    )
-                    # get external doors only
-                    for prop in doorProps:
-                        if prop.Name == "IsExternal":
-                            if prop.NominalValue.wrappedValue == True:
-                                out.append(doorParams(obj))
+    if windows is not None or doors is not None:
+        for obj in selectBox(space, extend=0.5):
+            if windows is not None and obj.is_a("IfcWindow"):
+                windows.append(windowParams(obj, debug, excelFormat))
+            # get external doors only
+            elif (
+                doors is not None
+                and obj.is_a("IfcDoor")
+                and isExternal(obj, "Pset_DoorCommon") == True
+            ):
+                doors.append(doorParams(obj))
 
     # get all walls that bound a space
     # print("\n\t####{}\n".format(space.Name))
-    for obj in space.BoundedBy:
-        if obj.RelatedBuildingElement != None and wallsOnly:
-            if obj.RelatedBuildingElement.is_a("IfcWall"):
-                out.append(wallParams(obj.RelatedBuildingElement))
-    return out
+    if walls is not None:
+        for obj in space.BoundedBy:
+            if obj.RelatedBuildingElement != None:
+                if obj.RelatedBuildingElement.is_a("IfcWall"):
+                    walls.append(wallParams(obj.RelatedBuildingElement))
+    return windows, doors, walls
+
+
+def spaceWindows(space, debug=False, excelFormat=False):
+    """
+    Get and formats information about the windows bounding a space only,
+    used by the analysis, which doesn't need the doors and walls.
+
+    Parameters
+    ----------
+    space: a single instance of an IFC space.
+
+    Returns
+    -------
+    The windows of intersectingObjectsAll.
+    """
+    return intersectingObjectsAll(space, debug, excelFormat, kinds=("windows",))[0]
 
 
-def arbiClosOut(prop, points):
+def arbiClosOut(prop):
     """
     Gets the points of a non rectangular space profile,
     creates a bounding box and gets the dimensions of it.
@@ -322,22 +467,19 @@ def arbiClosOut(prop, points):
     Parameters
     ----------
     prop: space property "IfcArbitraryClosedProfileDef"
-    points: empty list
 
     Returns
     -------
     An array of arrays formatted for writing to excel with column number always at index n,0.
     """
-    for point in prop.OuterCurve.Points:
-        points.append(point[0])
-
-    bot_left_x = min(point[0] for point in points)
-    bot_left_y = min(point[1] for point in points)
-    top_right_x = max(point[0] for point in points)
-    top_right_y = max(point[1] for point in points)
-
-    XDim = top_right_x - bot_left_x
-    YDim = top_right_y - bot_left_y
+    # (N, 2) array of the profile x, y coordinates
+    points = np.fromiter(
+        (c for point in prop.OuterCurve.Points for c in point.Coordinates[:2]),
+        dtype=np.float64,
+    ).reshape(-1, 2)
+
+    # bounding box is top right - bottom left point
+    XDim, YDim = (points.max(axis=0) - points.min(axis=0)).tolist()
     return [[2, round(XDim, 3), cell_format], [3, round(YDim, 3), cell_format]]
 
 
@@ -345,7 +487,7 @@ def spaceDims(space):
     """
     Gets the name, code, x, y and z dimension of space.
     Different methods for spaces with rectangular profile and irregular.
-    Hallway and Roof are excluded.
+    Only used on analyzableSpaces, so Hallway and Roof are excluded.
 
     Parameters
     ----------
@@ -355,82 +497,130 @@ def spaceDims(space):
     -------
     An array of arrays formatted for writing to excel with column number always at index n,0.
     """
-    points = []
-    if space.LongName != "Hallway" and space.LongName != "Roof":
+    prop = space.Representation.Representations[0][3][0][0]
+    out = []
+    # every cell carries a format (None for plain cells), since the
+    # bounding box dimensions of irregular spaces are highlighted
+    out.append([0, space.LongName, None])
+    out.append([1, space.Name, None])
+
+    if prop.is_a("IfcRectangleProfileDef"):
+        a, b = [[2, round(prop.XDim, 3), None], [3, round(prop.YDim, 3), None]]
+        out.append(b)
+        out.append(a)
+
+    elif prop.is_a("IfcArbitraryClosedProfileDef"):
+        a, b = arbiClosOut(prop)
+        out.append(a)
+        out.append(b)
+
+    spaceHeight = (
+        ifcopenshell.util.element.get_psets(space)
+        .get("PSet_Revit_Dimensions", {})
+        .get("Unbounded Height")
+    )
+    out.append([4, round(spaceHeight, 3), None])
 
-        prop = space.Representation.Representations[0][3][0][0]
-        out = []
-        out.append([0, space.LongName])
-        out.append([1, space.Name])
+    return out
 
-        if "IfcRectangleProfileDef" in str(prop):
-            a, b = [[2, round(prop.XDim, 3)], [3, round(prop.YDim, 3)]]
-            out.append(b)
-            out.append(a)
 
-        elif "IfcArbitraryClosedProfileDef" in str(prop):
-            a, b = arbiClosOut(prop, points)
-            out.append(a)
-            out.append(b)
+def excelWrite(sheetName, header, lines, debug=False):
+    """
+    Gets the formatted arrays for printing to excel.
+    Builds a dense row (gaps filled with None) for every line and writes
+    the whole sheet at once.
 
-        spaceHeight = selector.get_element_value(
-            space, "PSet_Revit_Dimensions.Unbounded Height"
-        )
-        out.append([4, round(spaceHeight, 3)])
+    Parameters
+    ----------
+    sheetName: name of the excel worksheet to create
+    header: formatted array written to the first row of the sheet
+    lines: Lines is a list of queries to print. The cells of a line are either
+        all [col, text] or all [col, text, formatting], formatting may be None.
 
-        return out
-    else:
-        pass
+    Returns
+    -------
+    The pyexcelerate worksheet, so column widths etc. can be set
+    """
+
+    rows = []
+    styles = []
+    for line in [header] + lines:
+
+        if debug:
+            print("line:", line)
+
+        row = [None] * (max(val[0] for val in line) + 1) if line else []
+        # pyexcelerate rows and columns are 1-indexed
+        rowNumber = len(rows) + 1
+        if line and len(line[0]) == 3:
+            for col, text, formatting in line:
+                row[col] = text
+                if formatting is not None:
+                    styles.append((rowNumber, col + 1, formatting))
+        else:
+            for col, text in line:
+                row[col] = text
+        rows.append(row)
 
+    width = max(len(row) for row in rows)
+    for row in rows:
+        row.extend([None] * (width - len(row)))
 
-def excelWrite(sheet, lines, debug=False):
+    sheet = workbook.new_sheet(sheetName, data=rows)
+    for row, col, formatting in styles:
+        sheet.set_cell_style(row, col, formatting)
+    return sheet
+
+
+def setColumn(sheet, firstCol, lastCol, width):
     """
-    Gets the formatted arrays for printing to excel.
-    Adjusts the row number if formatting is added to a cell.
+    Sets the width of the columns firstCol to lastCol (0-indexed, inclusive).
 
     Parameters
     ----------
-    sheet: Sheet is a object referencing the excel worksheet
-    lines: Lines is a list of queries to print
+    sheet: pyexcelerate worksheet
+    firstCol: first column
+    lastCol: last column
+    width: column width
 
     Returns
     -------
-    Prints to excel
+    Does not return anything
     """
+    for col in range(firstCol, lastCol + 1):
+        sheet.set_col_style(col + 1, Style(size=width))
+
 
-    i_adjust = 0
-    for i in range(0, len(lines)):
+def writeSheet(sheetName, lines, debug=False, headers=(), widths=None):
+    """
+    Writes a sheet with the header row and column widths given in SHEETS.
 
-        if lines[i] == None:
-            i_adjust = i_adjust - 1
+    Parameters
+    ----------
+    sheetName: name of the sheet, a key of SHEETS
+    lines: Lines is a list of queries to print
+    headers: extra header cells appended after the ones in SHEETS
+    widths: extra column widths, {(firstCol, lastCol): width}
 
-        else:
-            for val in lines[i]:
-
-                if debug:
-                    print("val:", val)
-                if len(val) == 2:
-                    col, text = val
-                    if debug:
-                        print(col, text)
-                    sheet.write(i + 1 + i_adjust, col, text)
-                elif len(val) == 3:
-                    col, text, formatting = val
-                    sheet.write(i + 1 + i_adjust, col, text, formatting)
-                else:
-                    raise Exception(
-                        "DataError",
-                        "excelWrites second argument should have length 2 or 3!",
-                    )
+    Returns
+    -------
+    The pyexcelerate worksheet
+    """
+    spec = SHEETS[sheetName]
+    header = [
+        [col, text, cell_format2]
+        for col, text in enumerate(list(spec["headers"]) + list(headers))
+    ]
+    sheet = excelWrite(sheetName, header, lines, debug)
+    for (firstCol, lastCol), width in {**spec["widths"], **(widths or {})}.items():
+        setColumn(sheet, firstCol, lastCol, width)
+    return sheet
 
 
 def spaceFunc(
     spaces,
     functions,
     nested=False,
-    windowsOnly=False,
-    doorsOnly=False,
-    wallsOnly=False,
     excelFormat=False,
 ):
     """
@@ -441,9 +631,6 @@ def spaceFunc(
     spaces: IFC spaces
     functions: Function to be run
     nested=False, #TODO add decription
-    windowsOnly=False,
-    doorsOnly=False,
-    wallsOnly=False,
     excelFormat=False,
 
     Returns
@@ -456,195 +643,183 @@ def spaceFunc(
     for space in spaces:
         for f in functions:
             if nested:
+                rows = f(space, excelFormat=excelFormat)
                 if excelFormat:
-                    rows = f(
-                        space,
-                        windowsOnly=windowsOnly,
-                        doorsOnly=doorsOnly,
-                        wallsOnly=wallsOnly,
-                        excelFormat=excelFormat,
-                    )
                     for val in rows:
                         out.append(val)
                 else:
-                    rows = f(
-                        space,
-                        windowsOnly=windowsOnly,
-                        doorsOnly=doorsOnly,
-                        wallsOnly=wallsOnly,
-                        excelFormat=excelFormat,
-                    )
                     out.append(rows)
             else:
                 out.append(f(space))
     return out
 
 
-def getMaterialAndQuantitiesHeaders(spaces):
+def getMaterialAndQuantitiesHeaders():
     """
-    Find the number of materials in wall material layer.
+    Find the largest number of materials in a wall material layer.
 
     Parameters
     ----------
-    spaces: IFC spaces
 
     Returns
     -------
     Number of materials
 
     """
-    most_materials = 0
-    for space in spaces:
-        for obj in space.BoundedBy:
-            if obj.RelatedBuildingElement != None:
-                if obj.RelatedBuildingElement.is_a("IfcWall"):
-                    if not "Roof" in str(obj.RelatedBuildingElement.Name):
-                        for (
-                            relAssociatesMaterial
-                        ) in obj.RelatedBuildingElement.HasAssociations:
-                            num_materials = len(
-                                relAssociatesMaterial.RelatingMaterial.ForLayerSet.MaterialLayers
-                            )
-                            if num_materials > most_materials:
-                                most_materials = num_materials
-    return most_materials
+    return max(
+        (len(layers) for walls in wallLayerIndex().values() for layers in walls),
+        default=0,
+    )
 
 
 ############
 ### MAIN ###
 ############
 
+# Header row and column widths of each sheet, widths are {(firstCol, lastCol): width}
+SHEETS = {
+    "Assumptions": {"headers": ["Assumptions"], "widths": {(0, 4): 15}},
+    "Spaces": {
+        "headers": ["Space Name", "Space Code", "X Dimension", "Y Dimension", "Height"],
+        "widths": {(0, 4): 15},
+    },
+    "Windows": {
+        "headers": [
+            "Space Name",
+            "Space Code",
+            "Winow Name",
+            "Window Tag",
+            "Height",
+            "Width",
+            "Sill Height",
+        ],
+        "widths": {(0, 4): 15, (2, 2): 45},
+    },
+    "External Doors": {
+        "headers": [
+            "Space Name",
+            "Space Code",
+            "External Door Name",
+            "Door Tag",
+            "Type",
+            "Height",
+            "Width",
+        ],
+        "widths": {(0, 4): 15, (2, 2): 45},
+    },
+    "Walls": {
+        "headers": [
+            "Space Name",
+            "Space Code",
+            "Wall Name",
+            "Wall Tag",
+            "Is external?",
+            "# layers",
+        ],
+        "widths": {(0, 4): 15, (2, 2): 50},
+    },
+}
+
+
+def sheetRows(spaces, analyzableSpaces, debug=False):
+    """
+    Builds the lines of the Spaces, Windows, External Doors and Walls sheets.
+    Only traverses the IFC model, main() does all the excel writes.
+
+    Parameters
+    ----------
+    spaces: IFC spaces
+    analyzableSpaces: IFC spaces without Hallway and Roof
+
+    Returns
+    -------
+    Dictionary of sheet name and the lines to be used by excelWrite
+    """
+    rows = {
+        "Spaces": spaceFunc(analyzableSpaces, [spaceDims]),
+        "Windows": [],
+        "External Doors": [],
+        "Walls": [],
+    }
+
+    # windows, doors and walls for all sheets are found in one pass over the spaces
+    for space in spaces:
+        windows, doors, walls = intersectingObjectsAll(space, debug, excelFormat=True)
+        rows["Windows"].extend(windows)
+        rows["External Doors"].extend(doors)
+        rows["Walls"].extend(walls)
+
+    return rows
+
 
-def main(debug=False):
+def main(spaces, analyzableSpaces, debug=False):
     """
     Main functions that builds excel sheets and calls the correct write functions.
 
     Parameters
     ----------
+    spaces: IFC spaces
+    analyzableSpaces: IFC spaces without Hallway and Roof
 
     Returns
     -------
 
     """
-    spaces = model.by_type("IfcSpace")
+    rows = sheetRows(spaces, analyzableSpaces, debug)
 
     # ASSUMPTIONS SHEET
-    assumptionsSheet = workbook.add_worksheet("Assumptions")
-    assumptionsSheet.set_column(0, 4, 15)
-    assumptionsSheet.write(0, 0, "Assumptions", cell_format2)
-    assumptionsSheet.write(1, 0, "Thermal conductivity", cell_format)
-    assumptionsSheet.write(2, 1, "Windows")
-    assumptionsSheet.write(3, 1, "Glass Doors")
-    assumptionsSheet.write(4, 1, "Non-glass External Doors")
-    assumptionsSheet.write(5, 1, "External Walls")
-    assumptionsSheet.write(2, 2, "1,2 W/m²K")
-    assumptionsSheet.write(3, 2, "1,5 W/m²K")
-    assumptionsSheet.write(4, 2, "1,4 W/m²K")
-    assumptionsSheet.write(5, 2, "0,09 W/m²K")
-    assumptionsSheet.write(
-        6,
-        0,
-        "Spaces with non-rectangular floor profile will be analyzed based on their bounding box",
-        cell_format,
-    )
-    assumptionsSheet.write(
-        7,
-        0,
-        "Example of Foyer floor profile and the bounding box points that will be used to create a new energy zone",
-    )
-    assumptionsSheet.insert_image(
-        "B12", "output/foyerpoints.png", {"x_offset": 15, "y_offset": 10}
+    writeSheet(
+        "Assumptions",
+        [
+            [[0, "Thermal conductivity", cell_format]],
+            [[1, "Windows"], [2, "1,2 W/m²K"]],
+            [[1, "Glass Doors"], [2, "1,5 W/m²K"]],
+            [[1, "Non-glass External Doors"], [2, "1,4 W/m²K"]],
+            [[1, "External Walls"], [2, "0,09 W/m²K"]],
+            [
+                [
+                    0,
+                    "Spaces with non-rectangular floor profile will be analyzed based on their bounding box",
+                    cell_format,
+                ]
+            ],
+            [
+                [
+                    0,
+                    "Example of Foyer floor profile and the bounding box points that will be used to create a new energy zone",
+                ]
+            ],
+        ],
+        debug,
     )
 
     # SPACES SHEET
-    spaceDimSheet = workbook.add_worksheet("Spaces")
-    spaceDimSheet.set_column(0, 4, 15)
-    spaceDimSheet.write(0, 0, "Space Name", cell_format2)
-    spaceDimSheet.write(0, 1, "Space Code", cell_format2)
-    spaceDimSheet.write(0, 2, "X Dimension", cell_format2)
-    spaceDimSheet.write(0, 3, "Y Dimension", cell_format2)
-    spaceDimSheet.write(0, 4, "Height", cell_format2)
-    spaceDimSheet.write(25, 2, "", cell_format)
-    spaceDimSheet.write(25, 3, "Based on bounding box")
-
-    excelWrite(spaceDimSheet, SpaceParams(spaceFunc(spaces, [spaceDims])).out, debug)
+    spaceDimSheet = writeSheet("Spaces", rows["Spaces"], debug)
+    spaceDimSheet.set_cell_style(26, 3, cell_format)
+    spaceDimSheet.set_cell_value(26, 4, "Based on bounding box")
 
     # WINDOW SHEET
-    windowSheet = workbook.add_worksheet("Windows")
-
-    windowSheet.set_column(0, 4, 15)
-    windowSheet.set_column(2, 2, 45)
-    windowSheet.write(0, 0, "Space Name", cell_format2)
-    windowSheet.write(0, 1, "Space Code", cell_format2)
-    windowSheet.write(0, 2, "Winow Name", cell_format2)
-    windowSheet.write(0, 3, "Window Tag", cell_format2)
-    windowSheet.write(0, 4, "Height", cell_format2)
-    windowSheet.write(0, 5, "Width", cell_format2)
-    windowSheet.write(0, 6, "Sill Height", cell_format2)
-
-    excelWrite(
-        windowSheet,
-        spaceFunc(
-            spaces,
-            [intersectingObjects],
-            nested=True,
-            windowsOnly=True,
-            excelFormat=True,
-        ),
-    )
+    writeSheet("Windows", rows["Windows"], debug)
 
     # DOOR SHEET
-    doorSheet = workbook.add_worksheet("External Doors")
-
-    doorSheet.set_column(0, 4, 15)
-    doorSheet.set_column(2, 2, 45)
-    doorSheet.write(0, 0, "Space Name", cell_format2)
-    doorSheet.write(0, 1, "Space Code", cell_format2)
-    doorSheet.write(0, 2, "External Door Name", cell_format2)
-    doorSheet.write(0, 3, "Door Tag", cell_format2)
-    doorSheet.write(0, 4, "Type", cell_format2)
-    doorSheet.write(0, 5, "Height", cell_format2)
-    doorSheet.write(0, 6, "Width", cell_format2)
-
-    excelWrite(
-        doorSheet,
-        spaceFunc(
-            spaces, [intersectingObjects], nested=True, doorsOnly=True, excelFormat=True
-        ),
-        debug,
-    )
+    writeSheet("External Doors", rows["External Doors"], debug)
 
     # WALL SHEET
-    wallSheet = workbook.add_worksheet("Walls")
-
-    wallSheet.set_column(0, 4, 15)
-    wallSheet.set_column(2, 2, 50)
-    wallSheet.write(0, 0, "Space Name", cell_format2)
-    wallSheet.write(0, 1, "Space Code", cell_format2)
-    wallSheet.write(0, 2, "Wall Name", cell_format2)
-    wallSheet.write(0, 3, "Wall Tag", cell_format2)
-    wallSheet.write(0, 4, "Is external?", cell_format2)
-    wallSheet.write(0, 5, "# layers", cell_format2)
-    material = 1
-    most_materials = getMaterialAndQuantitiesHeaders(spaces)
-
-    for a in range(6, (most_materials * 2) + 6, 2):
-        wallSheet.write(0, a, "Material {}".format(material), cell_format2)
-        wallSheet.write(0, a + 1, "Thickness", cell_format2)
-        wallSheet.set_column(a, a, 25)
-        material += 1
-
-    excelWrite(
-        wallSheet,
-        spaceFunc(
-            spaces, [intersectingObjects], nested=True, wallsOnly=True, excelFormat=True
-        ),
-        debug,
-    )
+    # a material and thickness column for each layer of the wall with most layers
+    materialHeaders = []
+    materialWidths = {}
+    most_materials = getMaterialAndQuantitiesHeaders()
+    for material in range(1, most_materials + 1):
+        materialHeaders += ["Material {}".format(material), "Thickness"]
+        materialWidths[(material * 2 + 4, material * 2 + 4)] = 25
+
+    writeSheet("Walls", rows["Walls"], debug, materialHeaders, materialWidths)
 
     return
 
 
-print(main(debug=False))
+if __name__ == "__main__":
+    spaces, analyzableSpaces = getSpaces()
+    print(main(spaces, analyzableSpaces, debug=False))
 
-workbook.close()
+    workbook.save("output/output_IFC_data.xlsx")
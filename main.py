@@ -18,9 +18,15 @@ from honeybee_plus.radiance.recipe.pointintime.gridbased import GridBased
 from honeybee_radiance_folder import ModelFolder
 from honeybee_plus.hbsurface import HBSurface
 from honeybee_plus.hbfensurface import HBFenSurface
+import daylight_analysis_load_IFC_data
 from daylight_analysis_load_IFC_data import *
 import os
+import hashlib
+import pickle
+import numpy as np
 from dataclasses import dataclass, InitVar
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Set radiance result folder to "room"
@@ -28,82 +34,70 @@ rf = "./room"
 folder = ModelFolder(rf)
 folder.write(overwrite=True)
 
+# Formatted IFC data and simulation results are cached here, outside ./room which is overwritten on every run
+CACHE_FOLDER = "./cache"
+
 
 #########################################
 ###CREATE WINDOWOUT AND SPACEOUT LISTS###
 #########################################
 
-# Temporary variable for storing spaces
-out = []
-
-# remove excel formatting for each space.
-for i in spaces:
-    out.append(SpaceParams((spaceDims(i)), excelFormat=False).out)
-
-# remove empty space entries
-spaceOut = [x for x in out if x != []]
+# spaceOut and windowOut are cached by IFC file path and modification time and by
+# the source of the loader and of this file, the code that builds them, so the
+# IFC model is only parsed again when the file or that code changes
+ifcHash = hashlib.sha1((IFC_PATH + str(os.path.getmtime(IFC_PATH))).encode())
+for sourceFile in (daylight_analysis_load_IFC_data.__file__, __file__):
+    with open(sourceFile, "rb") as f:
+        ifcHash.update(f.read())
+ifcKey = ifcHash.hexdigest()
+ifcCacheFile = os.path.join(CACHE_FOLDER, "ifc_%s.pkl" % ifcKey)
 
-# finds windows bounding space and formats for analysis
-windowOut = SpaceParams(
-    spaceFunc(
-        spaces,
-        [intersectingObjects],
-        nested=True,
-        windowsOnly=True,
-        excelFormat=False,
-    )
-).out
+if os.path.exists(ifcCacheFile):
+    with open(ifcCacheFile, "rb") as f:
+        spaceOut, windowOut = pickle.load(f)
+else:
+    spaces, analyzableSpaces = getSpaces()
 
-# remove empty window entries in window param list (windowOut)
-windowOut = [y for y in (x for x in windowOut if x != [])]
+    # remove excel formatting for each space and remove empty space entries
+    spaceOut = [
+        params
+        for params in (flattenAnalysis(spaceDims(i)) for i in analyzableSpaces)
+        if params
+    ]
 
+    # finds windows bounding space and formats for analysis
+    windowOut = [spaceWindows(space, excelFormat=False) for space in spaces]
 
-@dataclass
-class Window:
-    """
-    A window object with IFC window parameters used by the 'Spaces' class.
-    Attached to a Space
-
-    Parameters
-    ----------
-    name: a string containing the window ifc name
-    wx: (float) window x-dimension width
-    wy: (float)  window y-dimension height
-    sillHeight: (float)  sill height (height from floor to bottom of window)
-    wall_name: (str) parent wall orientation as string, one of ('left','right','front','back'), 'front' is North
-    wall_length: (float) parent wall length
-    loc_x: (float)  bottom left location point of window - x value (width)
-    loc_y: (float) bottom left location point of window - y value (height)
-
-    Returns
-    -------
-    Does not return anything
-    """
+    # remove empty window entries in window param list (windowOut)
+    windowOut = [x for x in windowOut if x]
 
-    name: str
-    wx: float
-    wy: float
-    sillHeight: float
-    wall_name: str
-    wall_length: float
-    loc_x: float
-    loc_y: float
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    with open(ifcCacheFile, "wb") as f:
+        pickle.dump((spaceOut, windowOut), f)
 
 
 @dataclass
 class Space:
     """
     A space object with IFC space parameters used by the 'Spaces' class.
-    Has Window attached to it.
+    The parameters of its windows are stored as one array per parameter,
+    with index i of every array belonging to the same window.
 
     Parameters
     ----------
     longName: (str) Descriptive name of space. Eg. "Bedroom".
     name: (str)  Unique space code Eg. "A203"
-    windows: (list) List of all window objects belonging to a given space
     sx: (float) Space width
     sy: (float) Space depth
     sz: (float) Space Height
+    windowName: (array of str) window ifc names
+    wx: (array of float) window x-dimension widths
+    wy: (array of float) window y-dimension heights
+    sillHeight: (array of float) sill heights (height from floor to bottom of window)
+    wall_name: (array of str) parent wall orientations, one of ('left','right','front','back'), 'front' is North
+    wall_length: (array of float) parent wall lengths
+    loc_x: (array of float) bottom left location points of windows - x value (width)
+    loc_y: (array of float) bottom left location points of windows - y value (height)
 
     Returns
     -------
@@ -112,10 +106,46 @@ class Space:
 
     longName: str
     name: str
-    windows: list
     sx: float
     sy: float
     sz: float
+    windowName: np.ndarray
+    wx: np.ndarray
+    wy: np.ndarray
+    sillHeight: np.ndarray
+    wall_name: np.ndarray
+    wall_length: np.ndarray
+    loc_x: np.ndarray
+    loc_y: np.ndarray
+
+
+# Overcast sky illuminance (lux) and the daylight factor (%) a gridpoint must reach
+SKY_ILLUMINANCE = 10000
+DF_REQUIREMENT = 2.1
+# Gridpoint illuminance (lux) matching the daylight factor requirement
+LUX_REQUIREMENT = SKY_ILLUMINANCE * DF_REQUIREMENT / 100
+
+# Banner lines of the terminal output
+BAR40 = 40 * "#"
+BAR50 = 50 * "#"
+
+
+@lru_cache(maxsize=None)
+def radianceProperties(lightTr):
+    """
+    Radiance glass material with light transmitance defined by user.
+    Cached, so all windows with the same light transmitance share one material.
+
+    Parameters
+    ----------
+    lightTr: (float) visible light transmittance value
+
+    Returns
+    -------
+    Honeybee RadianceProperties
+    """
+    glass_type = Glass.by_single_trans_value("transValue", lightTr)
+    return RadianceProperties(material=glass_type)
 
 
 class Analysis:
@@ -132,6 +162,7 @@ class Analysis:
     lightTr: (float) visible light transmittance value
     gridsize: (float) gridsize value
     analysisPlaneHeight: (float) analysis plane height value
+    spaces: (Spaces) existing Spaces object to analyse, built from spaceOut and windowOut if None
 
     Returns
     -------
@@ -160,46 +191,72 @@ class Analysis:
             height=space.sz,
             rotation_angle=0,
         )
+        # Map wall names (eg. 'back') to the room's wall surfaces, keeping the first match
+        room.wallByName = {}
+        for surface in room.surfaces:
+            for wallName in ("left", "right", "front", "back"):
+                if wallName in str(surface):
+                    room.wallByName.setdefault(wallName, surface)
 
         return room
 
-    def __addWindows(self, space, window):
-        """ Add window to room inside a space """
-        # Define Radiance glass material with light transmitance defined by user
-        glass_type = Glass.by_single_trans_value("transValue", self.lightTr)
-        radprops = RadianceProperties(material=glass_type)
-
-        # From surfaces created by __createRoom function, find the wall
-        # that window lies on (eg. 'back') and set it to hbsurface
-        for i in space.room.surfaces:
-            if window.wall_name in str(i):
-                hbsurface = i
+    def __addWindows(self, space):
+        """ Add all windows to room inside a space, one wall at a time """
+        # Radiance glass material with light transmitance defined by user
+        radprops = self.radprops
 
         # !COMPLICATED! - since IFC wall lenght ≠ space wall lenght
         # and window location point can be measured from either side (arbitrary), if the window location point
         # falls outside (is larger than) either space wall length, take the IFC wall lenght - (minus)
         # the location point - (minus) the window width.
-        if window.loc_x > space.sx and window.loc_x > space.sy:
-            window.loc_x = window.wall_length - window.loc_x - window.wx
+        # The space itself is left untouched, since the Spaces object is shared.
+        # hot-path: memory-bound
+        loc_x = np.where(
+            (space.loc_x > space.sx) & (space.loc_x > space.sy),
+            space.wall_length - space.loc_x - space.wx,
+            space.loc_x,
+        )
 
         # Construct glazing points:
         # because HBFenSurface needs glazing points defined by (x, y, z) for each point,
         # where y is the 'depth' of wall axis, it is set to 0 here.
         # The remaining three points are constructed from the original bottom left point, by adding window length/height.
-        glzpts = [
-            (window.loc_x, 0, window.loc_y),
-            (window.loc_x + window.wx, 0, window.loc_y),
-            (
-                window.loc_x + window.wx,
-                0,
-                window.loc_y + window.wy,
-            ),
-            (window.loc_x, 0, window.loc_y + window.wy),
-        ]
-        # Construct glazing surface from glazing points with same name as window
-        glzsrf = HBFenSurface(str(window.name), glzpts, rad_properties=radprops)
-        # Add glazing surface to the honeybee wall surface
-        hbsurface.add_fenestration_surface(glzsrf)
+        # glzpts has one row of 4 (x, y, z) points per window.
+        x0, x1 = loc_x, loc_x + space.wx
+        z0, z1 = space.loc_y, space.loc_y + space.wy
+        y = np.zeros_like(loc_x)
+        glzpts = np.stack(
+            [
+                np.stack([x0, y, z0], axis=-1),
+                np.stack([x1, y, z0], axis=-1),
+                np.stack([x1, y, z1], axis=-1),
+                np.stack([x0, y, z1], axis=-1),
+            ],
+            axis=1,
+        ).tolist()
+
+        # From surfaces created by __createRoom function, find each wall
+        # that windows lie on (eg. 'back') and set it to hbsurface
+        for wallName in dict.fromkeys(space.wall_name):
+            hbsurface = space.room.wallByName.get(wallName)
+            windows = np.flatnonzero(space.wall_name == wallName)
+            # Windows that couldn't be placed on a wall (eg. wall name "") are skipped
+            if hbsurface is None:
+                for i in windows:
+                    print(
+                        "Warning: window %s in space %s is not on a wall of the room and is skipped."
+                        % (space.windowName[i], space.name)
+                    )
+                continue
+            for i in windows:
+                # Construct glazing surface from glazing points with same name as window
+                glzsrf = HBFenSurface(
+                    str(space.windowName[i]),
+                    [tuple(pt) for pt in glzpts[i]],
+                    rad_properties=radprops,
+                )
+                # Add glazing surface to the honeybee wall surface
+                hbsurface.add_fenestration_surface(glzsrf)
 
     def __init__(
         self,
@@ -209,60 +266,140 @@ class Analysis:
         lightTr=0.6,
         gridsize=0.5,
         analysisPlaneHeight=0.75,
+        spaces=None,
     ):
         """Initialise Analysis. Create a honeybee room for each space and add windows to each wall of space"""
-        self.Spaces = Spaces(spaceOut, windowOut)
+        self.Spaces = spaces if spaces is not None else Spaces(spaceOut, windowOut)
         self.spacename = spacename
         self.lightTr = lightTr
+        self.radprops = radianceProperties(lightTr)
         self.gridsize = gridsize
         self.analysisPlaneHeight = analysisPlaneHeight
-        for space in self.Spaces.spaces:
-            space.room = self.__createRoom(space)
-            for window in space.windows:
-                self.__addWindows(space, window)
+        # Only the space chosen for analysis gets a room and windows
+        space = self.Spaces.byName[spacename]
+        space.room = self.__createRoom(space)
+        self.__addWindows(space)
+
+    def __cacheKey(self, space):
+        """Hash of the space and window geometry and the analysis settings, used to name cached results."""
+        # Arrays as lists, since the repr of a large array is shortened
+        windows = [
+            values.tolist()
+            for values in (
+                space.windowName,
+                space.wx,
+                space.wy,
+                space.sillHeight,
+                space.wall_name,
+                space.wall_length,
+                space.loc_x,
+                space.loc_y,
+            )
+        ]
+        params = (
+            space.sx,
+            space.sy,
+            space.sz,
+            windows,
+            self.lightTr,
+            self.gridsize,
+            self.analysisPlaneHeight,
+        )
+        return hashlib.sha1(repr(params).encode()).hexdigest()
 
-    def returnAnalysis(self):
-        """Run the gridbased daylight simulation using Radiance for space chosen by user."""
+    def __runSpace(self, space, targetFolder="."):
+        """
+        Run the gridbased daylight simulation using Radiance for a space, writing it to targetFolder.
+        Results of earlier runs with the same space and settings are loaded from CACHE_FOLDER instead.
 
-        for space in self.Spaces.spaces:
-            if space.name == self.spacename:
+        Returns
+        -------
+        numpy array of illuminance for each gridpoint
+        """
+        cacheFile = os.path.join(CACHE_FOLDER, self.__cacheKey(space) + ".npy")
+        if os.path.exists(cacheFile):
+            return np.load(cacheFile)
+
+        ####################################################################################
+        ### This part is based on example from https://github.com/ladybug-tools/honeybee ###
+        ####################################################################################
+
+        # run a grid-based analysis for this room
+        # generate an overcast sky with 10 000 lux
+        sky = CertainIlluminanceLevel(illuminance_value=SKY_ILLUMINANCE)
+
+        # generate grid of test points with grid size and analysis plane height chosen by user
+        analysis_grid = space.room.generate_test_points(
+            grid_size=self.gridsize,
+            height=self.analysisPlaneHeight,
+        )
 
-                ####################################################################################
-                ### This part is based on example from https://github.com/ladybug-tools/honeybee ###
-                ####################################################################################
+        # put the recipe together
+        rp = GridBased(
+            sky=sky,
+            analysis_grids=(analysis_grid,),
+            simulation_type=0,
+            hb_objects=(space.room,),
+        )
 
-                # run a grid-based analysis for this room
-                # generate an overcast sky with 10 000 lux
-                sky = CertainIlluminanceLevel(illuminance_value=10000)
+        # write simulation to folder
+        batch_file = rp.write(target_folder=targetFolder, project_name="room")
 
-                # generate grid of test points with grid size and analysis plane height chosen by user
-                analysis_grid = space.room.generate_test_points(
-                    grid_size=self.gridsize,
-                    height=self.analysisPlaneHeight,
-                )
+        # run the simulation
+        # hot-path: radiance-bound
+        rp.run(batch_file, debug=True)
 
-                # put the recipe together
-                rp = GridBased(
-                    sky=sky,
-                    analysis_grids=(analysis_grid,),
-                    simulation_type=0,
-                    hb_objects=(space.room,),
-                )
+        # results - in this case it will be an analysis grid
+        result = rp.results()[0]
+        values = np.fromiter(
+            (value[0] for value in result.combined_value_by_id()), dtype=np.float64
+        )
+        os.makedirs(CACHE_FOLDER, exist_ok=True)
+        np.save(cacheFile, values)
+        return values
 
-                # write simulation to folder
-                batch_file = rp.write(target_folder=".", project_name="room")
+    def returnAnalysis(self):
+        """Run the gridbased daylight simulation using Radiance for space chosen by user."""
+        return self.__runSpace(self.Spaces.byName[self.spacename])
 
-                # run the simulation
-                rp.run(batch_file, debug=True)
+    def returnAnalysisAll(self):
+        """
+        Run the gridbased daylight simulation for every space with windows.
+        Each Radiance run is a separate process, so the runs are started from a
+        thread pool and each space writes to its own folder. Spaces with the same
+        geometry share one run.
 
-                # results - in this case it will be an analysis grid
-                result = rp.results()[0]
-        return result
+        Returns
+        -------
+        dict of Space Code: numpy array of illuminance for each gridpoint
+        """
+        spaces = [space for space in self.Spaces.spaces if space.windowName.size]
+        # Rooms are only built for the space chosen by user in __init__
+        for space in spaces:
+            if space.name != self.spacename:
+                space.room = self.__createRoom(space)
+                self.__addWindows(space)
+
+        # Spaces with the same geometry (eg. mirrored A and B apartments) have the
+        # same cache key, so only the first space of each key is simulated
+        keys = [self.__cacheKey(space) for space in spaces]
+        spaceByKey = {}
+        for key, space in zip(keys, spaces):
+            spaceByKey.setdefault(key, space)
+
+        # hot-path: radiance-bound
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(
+                lambda space: self.__runSpace(space, "./room_%s" % space.name),
+                spaceByKey.values(),
+            )
+            resultByKey = dict(zip(spaceByKey, results))
+        return {space.name: resultByKey[key] for key, space in zip(keys, spaces)}
 
 
 class Spaces:
     """
-    Space object: maps the correct parameters into the Space and Window classes.
+    Space object: maps the correct parameters into the Space class.
     Can print the objects and their parameters.
 
     Parameters
@@ -275,51 +412,63 @@ class Spaces:
     Does not return anything.
     """
 
+    def __buildSpace(self, spaceParam, winBySpace):
+        """ Map space parameters and the space's windows to a Space with an array per window parameter """
+        # Map space parameters to Space class arguments
+        longName = spaceParam[0]
+        spaceId = spaceParam[1]
+        sx = spaceParam[2]
+        sy = spaceParam[3]
+        sz = spaceParam[4]
+        # The first two items of each window entry are Space Name and Space Code, these are skipped
+        windows = [
+            windowParam[i]
+            for windowParam in winBySpace.get(spaceId, ())
+            for i in range(2, len(windowParam))
+        ]
+
+        # Missing (None) values become nan in the float arrays
+        def column(j, dtype=float):
+            return np.array([window[j] for window in windows], dtype=dtype)
+
+        columns = {
+            "windowName": column(0, object),
+            "wx": column(1),
+            "wy": column(2),
+            "sillHeight": column(3),
+            "wall_name": column(4, object),
+            "wall_length": column(5),
+            "loc_x": column(6),
+            "loc_y": column(7),
+        }
+        columns["sillHeight"][np.isnan(columns["sillHeight"])] = 0.1
+
+        # Windows missing their size, location or wall length can't be placed and are skipped
+        missing = np.zeros(len(windows), dtype=bool)
+        for name in ("wx", "wy", "wall_length", "loc_x", "loc_y"):
+            missing |= np.isnan(columns[name])
+        for i in np.flatnonzero(missing):
+            print(
+                "Warning: window %s in space %s is missing its size or location and is skipped."
+                % (columns["windowName"][i], spaceId)
+            )
+        if missing.any():
+            columns = {name: values[~missing] for name, values in columns.items()}
+
+        return Space(longName, spaceId, sx, sy, sz, **columns)
+
     def __init__(self, spaceOut, windowOut):
-        self.spaces = []
-        for spaceParam in spaceOut:
-            # Map space parameters to Space class arguments
-            longName = spaceParam[0]
-            spaceId = spaceParam[1]
-            sx = spaceParam[2]
-            sy = spaceParam[3]
-            sz = spaceParam[4]
-            windows = []
-            for windowParam in windowOut:
-                # If window belongs to space, append the window's parameters
-                if windowParam[1] == spaceParam[1]:
-                    spaceParam.append(windowParam[2:])
-                    for i in range(2, (len(windowParam))):
-                        # The first two items are Space Name and Space Code, these are skipped
-                        if i != 0 or i != 1:
-                            # Map the window parameters to Window class arguments and append to the windows list
-                            windowName = windowParam[i][0]
-                            wx = windowParam[i][1]
-                            wy = windowParam[i][2]
-                            sillHeight = windowParam[i][3]
-                            if sillHeight == None:
-                                sillHeight = 0.1
-
-                            wall_name = windowParam[i][4]
-                            wall_length = windowParam[i][5]
-                            loc_x = windowParam[i][6]
-                            loc_y = windowParam[i][7]
-                            windows.append(
-                                Window(
-                                    windowName,
-                                    wx,
-                                    wy,
-                                    sillHeight,
-                                    wall_name,
-                                    wall_length,
-                                    loc_x,
-                                    loc_y,
-                                )
-                            )
-                else:
-                    pass
-
-            self.spaces.append(Space(longName, spaceId, windows, sx, sy, sz))
+        # Group the window entries by Space Code
+        # hot-path: memory-bound
+        winBySpace = {}
+        for windowParam in windowOut:
+            winBySpace.setdefault(windowParam[1], []).append(windowParam)
+
+        self.spaces = [
+            self.__buildSpace(spaceParam, winBySpace) for spaceParam in spaceOut
+        ]
+        # Look up spaces by Space Code
+        self.byName = {space.name: space for space in self.spaces}
 
     def print(self, spacename):
         """ Print formatted contents of Spaces for the user chosen space and its windows"""
@@ -330,25 +479,26 @@ class Spaces:
                     + "\n #### Name:%s | Code:%s | Width:%0.2f | Depth:%0.2f | Height:%0.1f"
                     % (space.longName, space.name, space.sx, space.sy, space.sz)
                 )
-                for window in space.windows:
+                for i in range(space.windowName.size):
                     print(
                         "\n Window: \n"
                         + "Window tag: %s | Width: %0.2f | Height: %0.2f | Sill height: %0.2f \n Parent wall name: %s | Parent wall length: %0.2f | Window x location on wall: %0.2f | Window y location on wall: %0.2f"
                         % (
-                            window.name,
-                            window.wx,
-                            window.wy,
-                            window.sillHeight,
-                            window.wall_name,
-                            window.wall_length,
-                            window.loc_x,
-                            window.loc_y,
+                            space.windowName[i],
+                            space.wx[i],
+                            space.wy[i],
+                            space.sillHeight[i],
+                            space.wall_name[i],
+                            space.wall_length[i],
+                            space.loc_x[i],
+                            space.loc_y[i],
                         )
                     )
 
 
-# FunSpaces = Spaces(spaceOut, windowOut)
-# FunSpaces.print("A203")
+# Spaces object shared by the user interface and the analysis
+AnalysisSpace = Spaces(spaceOut, windowOut)
+# AnalysisSpace.print("A203")
 
 
 def resultsOut(
@@ -361,7 +511,7 @@ def resultsOut(
     blur=False,
 ):
     """
-    Processes results into a percentage of area over 210 lux.
+    Processes results into a percentage of area reaching LUX_REQUIREMENT.
     Prints space info and plots results if triggered.
 
     Parameters
@@ -378,7 +528,6 @@ def resultsOut(
     -------
 
     """
-    resultList = []
     # Create an instance of Analysis object
     MyAnalysis = Analysis(
         spaceOut,
@@ -387,44 +536,30 @@ def resultsOut(
         lightTr,
         gridsize,
         analysisPlaneHeight,
+        AnalysisSpace,
     )
-    # Create an instance of space for analysis using Spaces
-    AnalysisSpace = Spaces(spaceOut, windowOut)
+    # Read the illuminance of each gridpoint once, used by both the result and the plot
+    gridValues = MyAnalysis.returnAnalysis()
 
-    # Get percentace of points over 210 lux
-    count = 0
-    countT = 0
     # DAYLIGHT FACTOR RESULT
-    for value in MyAnalysis.returnAnalysis().combined_value_by_id():
-        # print("illuminance value: %d lux" % value[0])
-        resultList.append(value[0])
-        DFpoint = value[0] / 10000 * 100
-        if DFpoint >= 2.1:
-            count += 1
-        countT += 1
+    # Get percentace of points reaching LUX_REQUIREMENT
+    # hot-path: memory-bound
+    count = int(np.count_nonzero(gridValues >= LUX_REQUIREMENT))
+    countT = gridValues.size
     DFresult = count / countT * 100
     # Print the percentagewise results
     print(
-        "\n"
-        + 40 * "#"
-        + "\n"
-        + "Daylight simulation results for "
-        + spacename
-        + ": \n"
-        + 40 * "#"
-        + "\n \n"
-        + str(round(DFresult, 2))
-        + " % of the room has at least 210 lux"
+        f"\n{BAR40}\nDaylight simulation results for {spacename}: \n{BAR40}\n \n"
+        f"{round(DFresult, 2)} % of the room has at least {LUX_REQUIREMENT:g} lux"
     )
     if DFresult >= 50:
         print(
-            "This room passes the Daylight Factor legislation of 2.1 %. \n \n"
-            + 40 * "#"
+            f"This room passes the Daylight Factor legislation of {DF_REQUIREMENT:g} %. \n \n{BAR40}"
         )
     else:
         print(
-            "This room does not pass the Daylight Factor legislation of at least 2.1% DF in half of the room area.\n \n"
-            + 40 * "#"
+            f"This room does not pass the Daylight Factor legislation of at least {DF_REQUIREMENT:g}% DF in half of the room area."
+            f"\n \n{BAR40}"
         )
 
     # PRINT formatted contents of space and its windows if chosen
@@ -433,30 +568,30 @@ def resultsOut(
 
     # PLOT the graph of space if chosen
     if showPlot == True:
+        # matplotlib is only imported when a plot is shown
+        import matplotlib.pyplot as plt
+
         # Find width of space analysed
-        spacedim = 0
-        for space in AnalysisSpace.spaces:
-            if space.name == spacename:
-                spacedim = float(space.sx)
+        spacedim = float(AnalysisSpace.byName[spacename].sx)
 
-        # resultList is an unnested list of results for each gridpoint and has
+        # gridValues is an unnested array of results for each gridpoint and has
         # to be turned into a matrix with the correct width x depth gridpoints.
         # Get number of gridpoints on space width
         dim = int(float(spacedim) // gridsize)
-        # Map resultList into a matrix using space width
-        z = [resultList[i : i + dim] for i in range(0, len(resultList), dim)]
+        # Map gridValues into a matrix using space width, dropping a ragged last row
+        z = gridValues[: (gridValues.size // dim) * dim].reshape(-1, dim)
+
+        # Blur the grid once before plotting, instead of interpolating on every redraw
+        if blur == True:
+            from scipy.ndimage import gaussian_filter
 
-        # Set blur property
-        if blur == False:
-            value = "nearest"
-        elif blur == True:
-            value = "gaussian"
+            z = gaussian_filter(z, sigma=1.0)
 
         # matplotlib stuff
         c = plt.imshow(
             z,
             cmap="YlOrRd",
-            interpolation=value,
+            interpolation="nearest",
             origin="lower",
         )
         cbar = plt.colorbar(c)
@@ -471,67 +606,64 @@ def resultsOut(
 ### USER INTERFACE ###
 ######################
 
-print(
-    "\n"
-    + 50 * "#"
-    + "\nHello! Welcome to Daylight Factor Check. \nYou can choose a space for analysis from the list below:\n"
-    + 50 * "#"
-)
-AnalysisSpace = Spaces(spaceOut, windowOut)
-spaceNameList = []
-for space in AnalysisSpace.spaces:
-    print("\n Space:" + "\n #### Name:%s | Code:%s" % (space.longName, space.name))
-    spaceNameList.append(str(space.name))
-
-spacename = input(
-    "\n Type the code of the space you want to analyze. \n Obs! Only bedrooms, living rooms and kitchens have windows! \n Space code: \n"
-)
-while spacename not in spaceNameList:
-    print("Ups! Wrong space code entered. Try entering a space code from the list.")
-    spacename = input("Type the code of the space you want to analyze: \n")
-
-lightTr = float(
-    input(
-        "Enter the visible light transmittance (VLT) for windows. Standard is 0.6.\nVLT: \n"
+YES_NO = frozenset(("yes", "no"))
+
+
+def askYesNo(prompt):
+    """
+    Ask the user a yes/no question until the answer is yes or no.
+
+    Parameters
+    ----------
+    prompt: (str) question shown to the user
+
+    Returns
+    -------
+    True for yes, False for no
+    """
+    answer = input(prompt)
+    while answer.lower() not in YES_NO:
+        answer = input("Please enter yes or no: ")
+    return answer.lower() == "yes"
+
+
+# The user interface only runs when main.py is run, not when it is imported
+if __name__ == "__main__":
+    print(
+        f"\n{BAR50}\nHello! Welcome to Daylight Factor Check. \nYou can choose a space for analysis from the list below:\n{BAR50}"
     )
-)
+    spaceNameList = []
+    for space in AnalysisSpace.spaces:
+        print("\n Space:" + "\n #### Name:%s | Code:%s" % (space.longName, space.name))
+        spaceNameList.append(str(space.name))
 
-gridsize = float(input("Enter the gridsize for analysis. Standard is 0.2 m: \n"))
-analysisPlaneHeight = float(
-    input(
-        "Enter the analysis plane height for analysis. Standard is 0.5 m: \n(0.5 m is normal for residential spaces, while 0.75 m for office spaces)\nAnalysis plane height: "
+    spacename = input(
+        "\n Type the code of the space you want to analyze. \n Obs! Only bedrooms, living rooms and kitchens have windows! \n Space code: \n"
     )
-)
-printInfo = input("Do you want to print info about space and its windows? (yes/no)\n")
-
-while printInfo.lower() not in {"yes", "no"}:
-    printInfo = input("Please enter yes or no: ")
-if printInfo.lower() == "yes":
-    printInfo = True
-elif printInfo.lower() == "no":
-    printInfo = False
-
-
-showPlot = input("Do you want to show plot of analysis? (yes/no)\n")
-
-while showPlot.lower() not in {"yes", "no"}:
-    showPlot = input("Please enter yes or no: ")
-if showPlot.lower() == "yes":
-    showPlot = True
-elif showPlot.lower() == "no":
-    showPlot = False
-
-
-blur = input("Do you want the grid contours to be blurred? (yes/no)\n")
-while blur.lower() not in {"yes", "no"}:
-    blur = input("Please enter yes or no: ")
-if blur.lower() == "yes":
-    blur = True
-elif blur.lower() == "no":
-    blur = False
-
-print(
-    resultsOut(
-        spacename, lightTr, gridsize, analysisPlaneHeight, printInfo, showPlot, blur
+    while spacename not in spaceNameList:
+        print("Ups! Wrong space code entered. Try entering a space code from the list.")
+        spacename = input("Type the code of the space you want to analyze: \n")
+
+    lightTr = float(
+        input(
+            "Enter the visible light transmittance (VLT) for windows. Standard is 0.6.\nVLT: \n"
+        )
+    )
+
+    gridsize = float(input("Enter the gridsize for analysis. Standard is 0.2 m: \n"))
+    analysisPlaneHeight = float(
+        input(
+            "Enter the analysis plane height for analysis. Standard is 0.5 m: \n(0.5 m is normal for residential spaces, while 0.75 m for office spaces)\nAnalysis plane height: "
+        )
+    )
+    printInfo = askYesNo(
+        "Do you want to print info about space and its windows? (yes/no)\n"
+    )
+    showPlot = askYesNo("Do you want to show plot of analysis? (yes/no)\n")
+    blur = askYesNo("Do you want the grid contours to be blurred? (yes/no)\n")
+
+    print(
+        resultsOut(
+            spacename, lightTr, gridsize, analysisPlaneHeight, printInfo, showPlot, blur
+        )
     )
-)
@@ -0,0 +1,193 @@
+"""
+Tests for Analysis.returnAnalysisAll, using stand-ins for the honeybee
+packages and Radiance, which are not needed to check the thread pool.
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Surface:
+    def __init__(self, name):
+        self.name = name
+        self.fenestrations = []
+
+    def __str__(self):
+        return "HBSurface: %s" % self.name
+
+    def add_fenestration_surface(self, fen):
+        self.fenestrations.append(fen)
+
+
+class Grid:
+    def __init__(self, n):
+        self.n = n
+
+
+class Room:
+    def __init__(self, origin, width, depth, height, rotation_angle):
+        self.width = width
+        self.depth = depth
+        names = ("floor", "ceiling", "frontWall", "rightWall", "backWall", "leftWall")
+        self.surfaces = [Surface(name) for name in names]
+
+    def generate_test_points(self, grid_size, height):
+        return Grid(int(self.width // grid_size) * int(self.depth // grid_size))
+
+
+class Result:
+    def __init__(self, values):
+        self.values = values
+
+    def combined_value_by_id(self):
+        return ((value,) for value in self.values)
+
+
+class GridBased:
+    runs = []
+    lock = threading.Lock()
+
+    def __init__(self, sky, analysis_grids, simulation_type, hb_objects):
+        self.grid = analysis_grids[0]
+        self.room = hb_objects[0]
+
+    def write(self, target_folder, project_name):
+        return os.path.join(target_folder, project_name)
+
+    def run(self, batch_file, debug=False):
+        with GridBased.lock:
+            GridBased.runs.append(batch_file)
+
+    def results(self):
+        fens = sum(len(surface.fenestrations) for surface in self.room.surfaces)
+        return [Result([float(i + 100 * fens) for i in range(self.grid.n)])]
+
+
+def stubModules():
+    """ Stand-in honeybee modules with the names main.py imports """
+    names = {
+        "honeybee_plus.room": {"Room": Room},
+        "honeybee_plus.radiance.material.glass": {
+            "Glass": types.SimpleNamespace(
+                by_single_trans_value=lambda name, value: (name, value)
+            )
+        },
+        "honeybee_plus.radiance.properties": {
+            "RadianceProperties": lambda material: types.SimpleNamespace(
+                material=material
+            )
+        },
+        "honeybee_plus.radiance.sky.certainIlluminance": {
+            "CertainIlluminanceLevel": lambda illuminance_value: illuminance_value
+        },
+        "honeybee_plus.radiance.recipe.pointintime.gridbased": {
+            "GridBased": GridBased
+        },
+        "honeybee_radiance_folder": {
+            "ModelFolder": lambda folder: types.SimpleNamespace(
+                write=lambda overwrite: None
+            )
+        },
+        "honeybee_plus.hbsurface": {"HBSurface": Surface},
+        "honeybee_plus.hbfensurface": {
+            "HBFenSurface": lambda name, points, rad_properties: (name, points)
+        },
+    }
+    modules = {}
+    for name, attributes in names.items():
+        parts = name.split(".")
+        for i in range(1, len(parts)):
+            package = ".".join(parts[:i])
+            modules.setdefault(package, types.ModuleType(package))
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        modules[name] = module
+    return modules
+
+
+class ReturnAnalysisAllTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # main.py reads the model and writes its caches in the working directory
+        cls.cwd = os.getcwd()
+        cls.folder = tempfile.TemporaryDirectory()
+        os.symlink(os.path.join(REPO, "model"), os.path.join(cls.folder.name, "model"))
+        os.chdir(cls.folder.name)
+
+        cls.modules = {name: sys.modules.get(name) for name in stubModules()}
+        sys.modules.update(stubModules())
+        sys.path.insert(0, REPO)
+        spec = importlib.util.spec_from_file_location(
+            "daylight_main", os.path.join(REPO, "main.py")
+        )
+        cls.main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.main)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(REPO)
+        for name, module in cls.modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        os.chdir(cls.cwd)
+        cls.folder.cleanup()
+
+    def setUp(self):
+        GridBased.runs.clear()
+
+    def analysis(self, spaceOut, windowOut):
+        spaces = self.main.Spaces(spaceOut, windowOut)
+        return self.main.Analysis(
+            spaceOut, windowOut, spaceOut[0][1], 0.6, 0.5, 0.5, spaces
+        )
+
+    def testRunsEverySpaceInItsOwnFolder(self):
+        spaceOut = [["Bedroom", "S1", 3.0, 4.0, 2.6], ["Kitchen", "S2", 5.0, 4.0, 2.6]]
+        windowOut = [
+            ["Bedroom", "S1", ["w1", 1.0, 1.2, 0.9, "back", 3.0, 0.5, 0.9]],
+            [
+                "Kitchen",
+                "S2",
+                ["w2", 1.0, 1.2, 0.9, "front", 5.0, 0.5, 0.9],
+                ["w3", 1.0, 1.2, 0.9, "left", 4.0, 1.5, 0.9],
+            ],
+        ]
+        results = self.analysis(spaceOut, windowOut).returnAnalysisAll()
+
+        self.assertEqual(set(results), {"S1", "S2"})
+        self.assertEqual(
+            sorted(GridBased.runs),
+            [os.path.join("./room_S1", "room"), os.path.join("./room_S2", "room")],
+        )
+        self.assertEqual(results["S1"].size, 6 * 8)
+        self.assertEqual(results["S2"].size, 10 * 8)
+        self.assertEqual(results["S1"][0], 100.0)
+        self.assertEqual(results["S2"][0], 200.0)
+
+    def testIdenticalSpacesShareOneRun(self):
+        # mirrored A and B spaces have the same geometry and windows
+        spaceOut = [["Bedroom", "A1", 3.5, 4.0, 2.6], ["Bedroom", "B1", 3.5, 4.0, 2.6]]
+        windowOut = [
+            ["Bedroom", space, ["w1", 1.0, 1.2, 0.9, "back", 3.5, 0.5, 0.9]]
+            for space in ("A1", "B1")
+        ]
+        results = self.analysis(spaceOut, windowOut).returnAnalysisAll()
+
+        self.assertEqual(GridBased.runs, [os.path.join("./room_A1", "room")])
+        self.assertEqual(set(results), {"A1", "B1"})
+        np.testing.assert_array_equal(results["A1"], results["B1"])
+
+
+if __name__ == "__main__":
+    unittest.main()